@@ -11,7 +11,6 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-import json
 import os
 import requests
 import urllib3
@@ -19,6 +18,7 @@ from http import HTTPStatus
 from datetime import datetime
 from collections import namedtuple
 
+from ..utils import codec
 
 _cached_control_session = None
 
@@ -290,7 +290,7 @@ class OutputStream:
     def push(self, data):
         if not isinstance(data, list):
             data = [data]
-        records = [{"data": json.dumps(rec)} for rec in data]
+        records = [{"data": codec.dumps(rec)} for rec in data]
         self._v3io_client.put_records(
             container=self._container, path=self._stream_path, records=records
         )
@@ -16,7 +16,8 @@ import json
 import nuclio
 
 from .function import RemoteRuntime, NuclioSpec
-from ..utils import logger
+from ..utils import logger, get_caller_globals
+from ..serving.http_server import LocalServer
 from ..serving.server import create_mock_server
 from ..serving.states import (
     ServingRouterState,
@@ -233,17 +234,20 @@ class ServingRuntime(RemoteRuntime):
             raise ValueError("nothing to deploy, .spec.graph is none, use .add_model()")
         return super().deploy(dashboard, project, tag)
 
-    def _get_runtime_env(self):
+    def _get_serving_spec(self):
         # we currently support a minimal topology of one router + multiple child routes/models
         # in the future we will extend the support to a full graph, the spec is already built accordingly
-        serving_spec = {
-            "function_uri": self._function_uri(),
+        return {
             "version": "v2",
             "parameters": self.spec.parameters,
             "graph": self.spec.graph.to_dict(),
             "load_mode": self.spec.load_mode,
             "verbose": self.verbose,
         }
+
+    def _get_runtime_env(self):
+        serving_spec = self._get_serving_spec()
+        serving_spec["function_uri"] = self._function_uri()
         return {"SERVING_SPEC_ENV": json.dumps(serving_spec)}
 
     def to_mock_server(self, namespace=None, log_level="debug"):
@@ -260,3 +264,31 @@ class ServingRuntime(RemoteRuntime):
             logger=logger,
             level=log_level,
         )
+
+    def to_local_server(
+        self, port=8080, workers=None, namespace=None, preload=False, log_level="info",
+    ):
+        """create a multi-process local http server (without nuclio), for local
+        performance testing or edge deployments
+
+        example:
+
+            server = fn.to_local_server(port=8080, workers=4, namespace=globals())
+            server.serve_forever()
+
+        :param port:      http port (0 for a random port, see server.port)
+        :param workers:   number of worker processes (default to the number of cpus)
+        :param namespace: classes search namespace, use globals() for current notebook
+        :param preload:   load the models once (before forking the workers) and share them
+        :param log_level: log level (error | info | debug)
+        """
+        if not self.spec.graph:
+            raise ValueError("nothing to serve, .spec.graph is none, use .add_model()")
+        return LocalServer(
+            self._get_serving_spec(),
+            port=port,
+            workers=workers,
+            namespace=namespace or get_caller_globals(),
+            preload=preload,
+            log_level=log_level,
+        )
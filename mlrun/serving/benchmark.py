@@ -0,0 +1,256 @@
+# Copyright 2018 Iguazio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import json
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle
+
+import numpy as np
+import pandas as pd
+
+import mlrun
+
+from .server import ModelServerHost, create_mock_server
+from .states import ServingRouterState
+
+result_columns = [
+    "kind",
+    "name",
+    "requests",
+    "errors",
+    "throughput",
+    "mean_ms",
+    "p50_ms",
+    "p95_ms",
+    "p99_ms",
+    "max_ms",
+]
+
+
+class LoadModes:
+    closed = "closed"
+    open = "open"
+
+
+class _Latencies:
+    """thread safe latency (and error) collector, grouped by kind + name"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def add(self, kind, name, latency, error=False):
+        with self._lock:
+            self.latencies[(kind, name)].append(latency)
+            if error:
+                self.errors[(kind, name)] += 1
+
+    def to_df(self, total_time):
+        rows = []
+        for (kind, name), values in self.latencies.items():
+            values = np.array(values) * 1000
+            p50, p95, p99 = np.percentile(values, [50, 95, 99])
+            rows.append(
+                [
+                    kind,
+                    name,
+                    len(values),
+                    self.errors[(kind, name)],
+                    len(values) / total_time if total_time else 0,
+                    values.mean(),
+                    p50,
+                    p95,
+                    p99,
+                    values.max(),
+                ]
+            )
+        return pd.DataFrame(rows, columns=result_columns)
+
+
+def _timed_handler(name, handler, latencies):
+    def wrapper(event, *args, **kwargs):
+        start = time.perf_counter()
+        error = True
+        try:
+            response = handler(event, *args, **kwargs)
+            error = False
+            return response
+        finally:
+            latencies.add("step", name, time.perf_counter() - start, error)
+
+    return wrapper
+
+
+def _instrument_steps(state, latencies, parent_name=""):
+    # the root router is usually unnamed, use its kind instead
+    name = state.name or state.kind
+    if parent_name:
+        name = f"{parent_name}.{name}"
+    if getattr(state, "_handler", None):
+        state._handler = _timed_handler(name, state._handler, latencies)
+    for child in state.get_children():
+        _instrument_steps(child, latencies, name)
+
+
+def _get_server(server, namespace=None, parameters=None, load_mode=None):
+    if isinstance(server, ModelServerHost):
+        return server
+    if hasattr(server, "to_mock_server"):
+        # ServingRuntime function object
+        return server.to_mock_server(namespace=namespace, log_level="error")
+    if isinstance(server, dict):
+        server = ServingRouterState.from_dict(server)
+    return create_mock_server(
+        graph=server,
+        parameters=parameters or {},
+        load_mode=load_mode,
+        namespace=namespace,
+        level="error",
+    )
+
+
+def benchmark_server(
+    server,
+    requests: list,
+    mode: str = LoadModes.closed,
+    concurrency: int = 1,
+    rate: float = None,
+    count: int = None,
+    duration: float = None,
+    warmup: int = 0,
+    namespace=None,
+    context=None,
+    key: str = "serving-benchmark",
+    labels: dict = None,
+) -> pd.DataFrame:
+    """run a load test against a serving graph (in a local mock server) and report
+    the throughput and latency percentiles per route and per graph step
+
+    example:
+
+        fn = mlrun.import_function('hub://v2_model_server')
+        fn.add_model("mymodel", model_path=model_path)
+        requests = [("mymodel/infer", {"inputs": [[5.1, 3.5, 1.4, 0.2]]})]
+        df = benchmark_server(fn, requests, concurrency=4, count=10000, namespace=globals())
+
+    :param server:      ServingRuntime function, mock server (create_mock_server) or graph (state/dict)
+    :param requests:    list of requests, each request is a (path, body) tuple or a dict
+                        with path, body and optional method, requests are sent in a round robin
+    :param mode:        "closed" loop, concurrency clients send a request after each response, or
+                        "open" loop, requests are sent at a fixed rate regardless of the responses
+    :param concurrency: number of concurrent clients (closed) or max in flight requests (open)
+    :param rate:        requests per second (open loop mode)
+    :param count:       total number of requests to send (default 1000 if duration is not set)
+    :param duration:    test duration in seconds (instead of count)
+    :param warmup:      number of warmup requests (not measured)
+    :param namespace:   classes search namespace, use globals() for current notebook
+    :param context:     optional MLRun context (or project), the results are logged as a dataset artifact
+    :param key:         the results artifact key
+    :param labels:      extra labels for the results artifact (e.g. model version)
+
+    :return: results DataFrame (kind, name, requests, errors, throughput, mean/p50/p95/p99/max ms)
+    """
+    if mode not in [LoadModes.closed, LoadModes.open]:
+        raise ValueError(f"illegal load mode {mode}, must be closed or open")
+    if mode == LoadModes.open and not rate:
+        raise ValueError("rate must be specified in open loop mode")
+    if not requests:
+        raise ValueError("at least one request must be specified")
+    if not count and not duration:
+        count = 1000
+
+    server = _get_server(server, namespace)
+    requests = [_normalize_request(request) for request in requests]
+    for _, request in zip(range(warmup), cycle(requests)):
+        server.test(silent=True, **request)
+
+    latencies = _Latencies()
+    _instrument_steps(server.graph, latencies)
+
+    def send(request, scheduled=None):
+        start = scheduled or time.perf_counter()
+        resp = server.test(silent=True, **request)
+        error = hasattr(resp, "status_code") and resp.status_code >= 300
+        latencies.add("route", request["path"], time.perf_counter() - start, error)
+
+    iterator = cycle(requests)
+    lock = threading.Lock()
+    start = time.perf_counter()
+    end_time = start + duration if duration else None
+    sent = [0]
+
+    def next_request():
+        with lock:
+            if (count and sent[0] >= count) or (
+                end_time and time.perf_counter() >= end_time
+            ):
+                return None
+            sent[0] += 1
+            return next(iterator)
+
+    if mode == LoadModes.closed:
+
+        def client():
+            request = next_request()
+            while request:
+                send(request)
+                request = next_request()
+
+        threads = [threading.Thread(target=client) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    else:
+        # latency is measured from the scheduled send time to avoid coordinated omission
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            interval = 1.0 / rate
+            scheduled = start
+            request = next_request()
+            while request:
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(send, request, scheduled)
+                scheduled += interval
+                request = next_request()
+
+    total_time = time.perf_counter() - start
+    df = latencies.to_df(total_time)
+    df.sort_values(["kind", "name"], inplace=True, ignore_index=True)
+
+    if context:
+        labels = labels or {}
+        labels.setdefault("mlrun_version", mlrun.mlconf.version)
+        labels.setdefault("mode", mode)
+        labels.setdefault("concurrency", str(concurrency))
+        context.log_dataset(key, df=df, labels=labels, format="csv", index=False)
+    return df
+
+
+def _normalize_request(request):
+    if isinstance(request, dict):
+        request = dict(request)
+    else:
+        path, body = request
+        request = {"path": path, "body": body}
+    request.setdefault("body", None)
+    request.setdefault("method", None)
+    if isinstance(request["body"], (dict, list)):
+        # send serialized bodies (like http clients), this also avoids sharing the body object
+        request["body"] = json.dumps(request["body"])
+    return request
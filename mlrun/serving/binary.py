@@ -0,0 +1,185 @@
+# Copyright 2018 Iguazio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""binary tensor payloads, following the KFServing/Triton v2 binary data extension
+
+the request body is a json header (its length is specified in the
+Inference-Header-Content-Length http header) followed by the raw tensor buffers,
+every binary input specifies its size in the "binary_data_size" parameter, e.g.:
+
+    {"inputs": [{"name": "x", "shape": [2, 3], "datatype": "FP32",
+                 "parameters": {"binary_data_size": 24}}],
+     "parameters": {"binary_data_output": true}}<24 bytes of x>
+
+the tensors are passed to the model as numpy arrays which point to the request
+body (no copy), and when "binary_data_output" is requested the outputs are
+returned in the same format
+"""
+import numpy as np
+
+from ..utils import codec
+
+header_length_key = "inference-header-content-length"
+binary_content_type = "application/octet-stream"
+
+datatype_to_dtype = {
+    "BOOL": np.bool_,
+    "UINT8": np.uint8,
+    "UINT16": np.uint16,
+    "UINT32": np.uint32,
+    "UINT64": np.uint64,
+    "INT8": np.int8,
+    "INT16": np.int16,
+    "INT32": np.int32,
+    "INT64": np.int64,
+    "FP16": np.float16,
+    "FP32": np.float32,
+    "FP64": np.float64,
+}
+dtype_to_datatype = {np.dtype(v): k for k, v in datatype_to_dtype.items()}
+
+
+def get_header_length(event):
+    """return the binary request json header length (or None if not a binary request)"""
+    headers = getattr(event, "headers", None)
+    if not headers or not isinstance(event.body, (bytes, bytearray, memoryview)):
+        return None
+    for key, value in headers.items():
+        if key.lower() == header_length_key:
+            return int(value)
+    return None
+
+
+def decode_request(body, header_length: int) -> dict:
+    """decode a binary request body into a request dict with numpy inputs
+
+    a single input tensor is returned as an array in request["inputs"], multiple
+    tensors are returned as a list of arrays (and their names in request["input_names"])
+    """
+    request = _load_header(body, header_length)
+    tensors = request.get("inputs", [])
+    arrays = _decode_tensors(tensors, body, header_length)
+    if len(arrays) == 1:
+        request["inputs"] = arrays[0]
+    else:
+        request["inputs"] = arrays
+        request["input_names"] = [tensor.get("name", "") for tensor in tensors]
+    return request
+
+
+def decode_response(body, header_length: int) -> dict:
+    """decode a binary response body, the outputs are returned as numpy arrays"""
+    response = _load_header(body, header_length)
+    arrays = _decode_tensors(response.get("outputs", []), body, header_length)
+    response["outputs"] = arrays[0] if len(arrays) == 1 else arrays
+    return response
+
+
+def binary_output_requested(request) -> bool:
+    parameters = request.get("parameters") if isinstance(request, dict) else None
+    return bool(parameters and parameters.get("binary_data_output"))
+
+
+def encode_response(response: dict):
+    """encode the response outputs (array or list of arrays) into a binary body
+
+    :return: body (bytes) and the json header length
+    """
+    outputs = response.get("outputs")
+    if not isinstance(outputs, (list, tuple)) or not all(
+        isinstance(output, np.ndarray) for output in outputs
+    ):
+        # a single output tensor (array or nested lists)
+        outputs = [outputs]
+    names = [f"output{i}" for i in range(len(outputs))]
+    header = dict(response)
+    header["outputs"], buffers = _encode_tensors(outputs, names)
+    return _join(header, buffers)
+
+
+def encode_request(inputs, binary_output=True, **fields):
+    """encode numpy inputs (array or dict of name: array) into a binary request body
+
+    example:
+
+        body, headers = encode_request(np.random.rand(1000, 20))
+        resp = requests.post(f"{url}/v2/models/mymodel/infer", data=body, headers=headers)
+
+    :return: body (bytes) and the http headers to send with it
+    """
+    if isinstance(inputs, np.ndarray):
+        inputs = {"input0": inputs}
+    header = dict(fields)
+    if binary_output:
+        header.setdefault("parameters", {})["binary_data_output"] = True
+    header["inputs"], buffers = _encode_tensors(
+        list(inputs.values()), list(inputs.keys())
+    )
+    body, header_length = _join(header, buffers)
+    return body, {"Inference-Header-Content-Length": str(header_length)}
+
+
+def _load_header(body, header_length):
+    try:
+        return codec.loads(bytes(body[:header_length]))
+    except ValueError as e:
+        raise ValueError(f"failed to parse the binary payload json header, {e}")
+
+
+def _decode_tensors(tensors, body, offset):
+    arrays = []
+    for tensor in tensors:
+        datatype = tensor.get("datatype", "")
+        if datatype not in datatype_to_dtype:
+            raise ValueError(f"unsupported tensor datatype {datatype}")
+        dtype = np.dtype(datatype_to_dtype[datatype])
+        shape = tensor.get("shape", [-1])
+        size = (tensor.get("parameters") or {}).get("binary_data_size")
+        if size is None:
+            array = np.array(tensor.get("data", []), dtype=dtype)
+        else:
+            if offset + size > len(body):
+                raise ValueError(f"binary tensor {tensor.get('name')} exceeds the body")
+            # the array points to the body buffer (no copy)
+            array = np.frombuffer(
+                body, dtype=dtype, count=size // dtype.itemsize, offset=offset
+            )
+            offset += size
+        arrays.append(array.reshape(shape))
+    return arrays
+
+
+def _encode_tensors(arrays, names):
+    tensors = []
+    buffers = []
+    for name, array in zip(names, arrays):
+        array = np.ascontiguousarray(array)
+        if array.dtype not in dtype_to_datatype:
+            raise ValueError(f"unsupported tensor dtype {array.dtype}")
+        tensors.append(
+            {
+                "name": name,
+                "shape": list(array.shape),
+                "datatype": dtype_to_datatype[array.dtype],
+                "parameters": {"binary_data_size": array.nbytes},
+            }
+        )
+        buffers.append(memoryview(array.reshape(-1)).cast("B"))
+    return tensors, buffers
+
+
+def _join(header, buffers):
+    header = codec.dumps(header)
+    if isinstance(header, str):
+        header = header.encode()
+    return b"".join([header] + buffers), len(header)
@@ -0,0 +1,234 @@
+# Copyright 2018 Iguazio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+from copy import deepcopy
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+from .server import MockContext, MockEvent, ModelServerHost, v2_serving_handler
+from ..utils import logger
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # idle keep-alive connections are closed after timeout (allow graceful stop)
+    timeout = 5
+
+    def _handle(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else None
+        event = MockEvent(
+            body=body,
+            content_type=self.headers.get("Content-Type"),
+            headers=dict(self.headers),
+            method=self.command,
+            path=self.path,
+        )
+        event.trigger = "http"
+        context = self.server.host.context
+        resp = v2_serving_handler(context, event)
+
+        status_code, content_type, headers = 200, "application/json", {}
+        if isinstance(resp, context.Response):
+            status_code = resp.status_code
+            content_type = resp.content_type
+            headers = resp.headers or {}
+            resp = resp.body
+        if resp is None:
+            resp = b""
+        elif isinstance(resp, str):
+            resp = resp.encode()
+        elif not isinstance(resp, (bytes, bytearray)):
+            resp = str(resp).encode()
+
+        self.send_response(status_code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(resp)))
+        for key, value in headers.items():
+            self.send_header(key, str(value))
+        self.end_headers()
+        self.wfile.write(resp)
+
+    do_GET = _handle
+    do_POST = _handle
+    do_PUT = _handle
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _WorkerHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = False
+    block_on_close = True
+
+    def __init__(self, sock, host: ModelServerHost):
+        super().__init__(
+            sock.getsockname()[:2], _RequestHandler, bind_and_activate=False
+        )
+        # use the listening socket shared by all the workers
+        self.socket.close()
+        self.socket = sock
+        self.host = host
+
+
+def _run_worker(sock, spec, namespace, host, log_level):
+    if not host:
+        host = ModelServerHost.from_dict(deepcopy(spec))
+        host.init(MockContext(log_level), namespace)
+    httpd = _WorkerHTTPServer(sock, host)
+
+    def graceful_stop(signum, frame):
+        # stop accepting requests, in-flight requests are completed before exit
+        threading.Thread(target=httpd.shutdown).start()
+
+    signal.signal(signal.SIGTERM, graceful_stop)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGHUP, signal.SIG_DFL)
+    httpd.serve_forever()
+    httpd.server_close()
+
+
+class LocalServer:
+    """multi-process local http server for serving graphs (no nuclio dependency)
+
+    the server forks N worker processes which share the same listening socket, each
+    worker initializes the graph from the same serving spec (the model files are shared
+    through the OS page cache), with preload=True the graph (and models) are loaded once
+    in the parent process and shared with the workers (copy on write memory)
+
+    reload() (or SIGHUP when using serve_forever()) restarts the workers one at a time,
+    old workers complete their in-flight requests before they exit
+
+    example:
+
+        server = fn.to_local_server(port=8080, workers=4, namespace=globals())
+        server.serve_forever()
+
+    :param spec:       serving spec dict (version, parameters, graph, load_mode, ..)
+    :param port:       http port (0 for a random port, see server.port)
+    :param workers:    number of worker processes (default to the number of cpus)
+    :param host:       listening address
+    :param namespace:  classes search namespace
+    :param preload:    load the graph in the parent process before forking the workers
+    :param log_level:  workers log level
+    """
+
+    def __init__(
+        self,
+        spec: dict,
+        port: int = 8080,
+        workers: int = None,
+        host: str = "0.0.0.0",
+        namespace=None,
+        preload: bool = False,
+        log_level: str = "info",
+    ):
+        self.spec = spec
+        self.workers = workers or os.cpu_count() or 1
+        self.namespace = namespace or {}
+        self.preload = preload
+        self.log_level = log_level
+        self._host = None
+        self._processes = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._mp = multiprocessing.get_context("fork")
+
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((host, port))
+        self._socket.listen(128)
+        self.port = self._socket.getsockname()[1]
+
+    def _load_host(self):
+        if not self.preload:
+            return None
+        spec = deepcopy(self.spec)
+        spec["load_mode"] = "sync"
+        host = ModelServerHost.from_dict(spec)
+        host.init(MockContext(self.log_level), self.namespace)
+        return host
+
+    def _start_worker(self):
+        process = self._mp.Process(
+            target=_run_worker,
+            args=(self._socket, self.spec, self.namespace, self._host, self.log_level),
+            daemon=True,
+        )
+        process.start()
+        return process
+
+    def start(self):
+        """start the worker processes (non blocking)"""
+        with self._lock:
+            self._host = self._load_host()
+            self._processes = [self._start_worker() for _ in range(self.workers)]
+        logger.info(
+            "local server started", port=self.port, workers=len(self._processes)
+        )
+        return self
+
+    def reload(self, spec: dict = None):
+        """graceful reload, restart the workers one at a time (with an optional new spec)"""
+        with self._lock:
+            if spec:
+                self.spec = spec
+            self._host = self._load_host()
+            for index, old in enumerate(self._processes):
+                self._processes[index] = self._start_worker()
+                old.terminate()
+                old.join()
+        logger.info("local server reloaded", port=self.port)
+
+    def stop(self, timeout=30):
+        """stop the workers (after they complete their in-flight requests)"""
+        self._stopped.set()
+        with self._lock:
+            for process in self._processes:
+                process.terminate()
+            for process in self._processes:
+                process.join(timeout)
+                if process.is_alive():
+                    process.kill()
+            self._processes = []
+        self._socket.close()
+
+    def serve_forever(self):
+        """start and serve until interrupted, SIGHUP reloads the workers"""
+        if not self._processes:
+            self.start()
+        signal.signal(
+            signal.SIGHUP,
+            lambda signum, frame: threading.Thread(target=self.reload).start(),
+        )
+        signal.signal(signal.SIGTERM, lambda signum, frame: self._stopped.set())
+        try:
+            while not self._stopped.wait(1):
+                self._restart_dead_workers()
+        except KeyboardInterrupt:
+            pass
+        self.stop()
+
+    def _restart_dead_workers(self):
+        with self._lock:
+            for index, process in enumerate(self._processes):
+                if not process.is_alive():
+                    logger.warning(
+                        "worker exited, restarting", exitcode=process.exitcode
+                    )
+                    self._processes[index] = self._start_worker()
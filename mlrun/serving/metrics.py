@@ -0,0 +1,157 @@
+# Copyright 2018 Iguazio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import random
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+# latency histogram buckets (in seconds)
+default_buckets = [
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+]
+
+
+class Histogram:
+    """latency histogram with fixed (cumulative, prometheus style) buckets"""
+
+    def __init__(self, buckets=None):
+        self.buckets = buckets or default_buckets
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def to_dict(self):
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets + ["+Inf"], self.counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        return {"count": self.count, "sum": self.sum, "buckets": buckets}
+
+
+class ServingMetrics:
+    """in-process per step/operation latency metrics and (sampled) event tracing
+
+    the metrics are enabled with the "metrics" function parameter, and tracing with the
+    "trace_sample" parameter (the fraction of events to trace, e.g. 0.01), when disabled
+    the graph is not instrumented and there is no overhead
+    """
+
+    metric_name = "mlrun_serving_step_latency_seconds"
+
+    def __init__(self, trace_sample=0.0, logger=None):
+        self.trace_sample = trace_sample
+        self.logger = logger
+        self.histograms = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @classmethod
+    def from_params(cls, parameters, logger=None):
+        trace_sample = float(parameters.get("trace_sample", 0) or 0)
+        enabled = str(parameters.get("metrics", "")).lower() in ["1", "true", "yes"]
+        if not enabled and not trace_sample:
+            return None
+        return cls(trace_sample, logger)
+
+    def observe(self, step, op, value):
+        key = (step, op)
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(key, Histogram())
+        histogram.observe(value)
+
+        spans = getattr(self._local, "spans", None)
+        if spans is not None:
+            spans.append({"step": step, "op": op, "microsec": int(value * 1000000)})
+
+    def timed(self, step, op, handler):
+        """wrap a handler/method with latency measurement"""
+
+        @wraps(handler)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return handler(*args, **kwargs)
+            finally:
+                self.observe(step, op, time.perf_counter() - start)
+
+        return wrapper
+
+    def instrument(self, obj, step, methods):
+        """replace the object methods with timed methods (when exist)"""
+        for method in methods:
+            handler = getattr(obj, method, None)
+            if handler:
+                setattr(obj, method, self.timed(step, method.strip("_"), handler))
+
+    def start_trace(self):
+        """start a trace for the current event (if sampled)"""
+        if self.trace_sample and random.random() < self.trace_sample:
+            self._local.spans = []
+
+    def end_trace(self, event):
+        """end the current event trace and log its spans"""
+        spans = getattr(self._local, "spans", None)
+        if spans is None:
+            return
+        self._local.spans = None
+        if self.logger:
+            self.logger.info("event trace", event_id=event.id, spans=spans)
+        return spans
+
+    def to_dict(self):
+        return {
+            f"{step}.{op}": histogram.to_dict()
+            for (step, op), histogram in list(self.histograms.items())
+        }
+
+    def to_prometheus(self):
+        """return the metrics in prometheus text format"""
+        name = self.metric_name
+        lines = [
+            f"# HELP {name} serving graph step latency",
+            f"# TYPE {name} histogram",
+        ]
+        for (step, op), histogram in sorted(list(self.histograms.items())):
+            data = histogram.to_dict()
+            labels = f'step="{step}",op="{op}"'
+            for bound, count in data["buckets"].items():
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f"{name}_sum{{{labels}}} {data['sum']}")
+            lines.append(f"{name}_count{{{labels}}} {data['count']}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,199 @@
+# Copyright 2018 Iguazio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+import asyncio
+import threading
+import time
+
+import aiohttp
+
+from ..utils import codec
+
+_loop = None
+_loop_lock = threading.Lock()
+
+retry_status_codes = [502, 503, 504]
+
+
+def _get_loop():
+    """return the (shared) background event loop used by the remote handlers"""
+    global _loop
+    with _loop_lock:
+        if not _loop or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            thread = threading.Thread(
+                target=_loop.run_forever, name="remote-http-loop", daemon=True
+            )
+            thread.start()
+    return _loop
+
+
+class CircuitBreaker:
+    """simple circuit breaker, fail fast when the remote endpoint is unhealthy
+
+    after max_failures consecutive failures the circuit opens and calls fail immediately,
+    after reset_timeout seconds a single trial call is allowed (half open), if it succeeds
+    the circuit is closed again
+    """
+
+    def __init__(self, max_failures=5, reset_timeout=30):
+        self.max_failures = max_failures
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self._opened_at is not None
+
+    def allow(self):
+        """return True if a call is allowed"""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial or time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self._trial = True
+            return True
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or (
+                self.max_failures and self.failures >= self.max_failures
+            ):
+                self._opened_at = time.monotonic()
+            self._trial = False
+
+
+class RemoteHttpHandler:
+    """class for calling remote endpoints
+
+    requests are sent over a pooled asyncio (aiohttp) session, the number of concurrent
+    requests to the endpoint is limited by max_concurrency, and a circuit breaker fails
+    the requests fast (after breaker_failures consecutive failures) while the remote is unhealthy
+
+    :param url:              remote endpoint url
+    :param max_concurrency:  max number of concurrent requests to the endpoint
+    :param timeout:          request timeout in seconds
+    :param retries:          number of retries on connection errors or 502/503/504 responses
+    :param breaker_failures: consecutive failures which open the circuit (0 to disable)
+    :param breaker_reset:    seconds to wait before retrying an open circuit
+    """
+
+    def __init__(
+        self,
+        url,
+        max_concurrency=32,
+        timeout=60,
+        retries=1,
+        breaker_failures=5,
+        breaker_reset=30,
+        name=None,
+        context=None,
+    ):
+        self.url = url
+        self.name = name
+        self.context = context
+        self.format = "json"
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.breaker = CircuitBreaker(breaker_failures, breaker_reset)
+        self._session = None
+        self._semaphore = None
+
+    def _get_session(self):
+        # the session and semaphore must be created inside the running event loop
+        if not self._session or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_concurrency, ssl=False, enable_cleanup_closed=True
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+
+    def do_event(self, event):
+        """send the event to the remote endpoint (blocking)"""
+        if not self.breaker.allow():
+            raise RuntimeError(f"circuit is open, remote function {self.url} is down")
+        future = asyncio.run_coroutine_threadsafe(
+            self._do_event_async(event), _get_loop()
+        )
+        return future.result()
+
+    async def do_event_async(self, event):
+        """send the event to the remote endpoint (asyncio)"""
+        if not self.breaker.allow():
+            raise RuntimeError(f"circuit is open, remote function {self.url} is down")
+        return await self._do_event_async(event)
+
+    async def _do_event_async(self, event):
+        kwargs = {}
+        kwargs["headers"] = dict(event.headers or {})
+        method = event.method or "POST"
+        if method != "GET":
+            if isinstance(event.body, (str, bytes)):
+                kwargs["data"] = event.body
+            else:
+                kwargs["data"] = codec.dumps(event.body)
+                kwargs["headers"]["Content-Type"] = "application/json"
+
+        path = event.path or ""
+        if path and not path.startswith("/"):
+            path = "/" + path
+        url = self.url.strip("/") + path
+        session = self._get_session()
+        try:
+            async with self._semaphore:
+                status, data, content_type = await self._request(
+                    session, method, url, kwargs
+                )
+        except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as err:
+            self.breaker.failure()
+            raise OSError(f"error: cannot run function at url {url}, {err}")
+
+        if status >= 500:
+            self.breaker.failure()
+        else:
+            self.breaker.success()
+        if status >= 400:
+            raise RuntimeError(f"bad function response {data.decode(errors='ignore')}")
+
+        if self.format == "json" or content_type == "application/json":
+            data = codec.loads(data)
+        event.body = data
+        return event
+
+    async def _request(self, session, method, url, kwargs):
+        for attempt in range(self.retries + 1):
+            last_attempt = attempt == self.retries
+            try:
+                async with session.request(method, url, **kwargs) as resp:
+                    data = await resp.read()
+                    if last_attempt or resp.status not in retry_status_codes:
+                        return resp.status, data, resp.content_type
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if last_attempt:
+                    raise
+            await asyncio.sleep(0.1 * (attempt + 1))
@@ -12,12 +12,14 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import json
 import mlrun
 
+from . import binary
+from ..utils import codec
 from .v2_serving import _ModelLogPusher
 
 from io import BytesIO
+import numpy as np
 from numpy.core.fromnumeric import mean
 from datetime import datetime
 import copy
@@ -45,14 +47,19 @@ class BaseModelRouter:
         self.protocol = protocol or "v2"
         self.url_prefix = url_prefix or f"/{self.protocol}/models"
         self.health_prefix = health_prefix or f"/{self.protocol}/health"
+        self.metrics_path = "/metrics"
         self.inputs_key == "instances" if self.protocol == "v1" else "inputs"
         self.kwargs = kwargs
 
     def parse_event(self, event):
         parsed_event = {}
+        header_length = binary.get_header_length(event)
+        if header_length:
+            # binary tensors payload (json header + raw buffers)
+            return binary.decode_request(event.body, header_length)
         try:
             if not isinstance(event.body, dict):
-                body = json.loads(event.body)
+                body = codec.loads(event.body)
             else:
                 body = event.body
             if "data_url" in body:
@@ -97,6 +104,15 @@ class BaseModelRouter:
             event.body = self.get_metadata()
             return event
 
+        # return the step latency metrics (prometheus format), when enabled
+        metrics = getattr(self.context, "metrics", None)
+        if method == "GET" and urlpath == self.metrics_path and metrics:
+            setattr(event, "terminated", True)
+            event.body = self.context.Response(
+                body=metrics.to_prometheus(), content_type="text/plain"
+            )
+            return event
+
         # check for legal path prefix
         if urlpath and not urlpath.startswith(self.url_prefix) and not urlpath == "/":
             raise ValueError(
@@ -372,13 +388,6 @@ class VotingEnsemble(BaseModelRouter):
         events.body = event
         return events
 
-    def preprocess(self, event):
-        try:
-            event.body = json.loads(event.body)
-            return event
-        except Exception:
-            return event
-
     def do_event(self, event, *args, **kwargs):
         """handle incoming events
 
@@ -392,13 +401,15 @@ class VotingEnsemble(BaseModelRouter):
             Response: Event response after running the event processing logic
         """
         start = datetime.now()
+        if event.body and (event.method or "POST") != "GET":
+            # parse the body once, the parsed body is kept on the event
+            event.body = self.parse_event(event)
         event = self.preprocess(event)
-        request = event.body
-        request = self.validate(request)
         event = self._pre_handle_event(event)
         if hasattr(event, "terminated") and event.terminated:
             return event
         else:
+            request = self.validate(event.body)
             response = self.postprocess(self._vote(self._handle_event(event)))
             if self._model_logger and self.log_router:
                 if "id" not in request:
@@ -449,7 +460,7 @@ class VotingEnsemble(BaseModelRouter):
             if "inputs" not in request:
                 raise Exception('Expected key "inputs" in request body')
 
-            if not isinstance(request["inputs"], list):
+            if not isinstance(request["inputs"], (list, np.ndarray)):
                 raise Exception('Expected "inputs" to be a list')
         return request
 
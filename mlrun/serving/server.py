@@ -19,10 +19,12 @@ import traceback
 import uuid
 from copy import deepcopy
 
+from .metrics import ServingMetrics
 from .states import ServingRouterState, ServingTaskState
 from ..model import ModelObj
 from ..platforms.iguazio import OutputStream
 from ..utils import create_logger, get_caller_globals
+from ..utils import codec
 
 
 class _StreamContext:
@@ -84,6 +86,13 @@ class ModelServerHost(ModelObj):
         setattr(context, "stream", _StreamContext(self.parameters, self.function_uri))
         setattr(context, "merge_root_params", self.merge_root_params)
         setattr(context, "verbose", self.verbose)
+        load_workers = self.parameters.get("load_workers")
+        setattr(context, "load_workers", int(load_workers) if load_workers else None)
+        setattr(
+            context,
+            "metrics",
+            ServingMetrics.from_params(self.parameters, context.logger),
+        )
 
         self.graph.init_object(context, namespace, self.load_mode)
         setattr(self.context, "root", self.graph)
@@ -157,19 +166,26 @@ def v2_serving_init(context, namespace=None):
 
 
 def v2_serving_handler(context, event, get_body=False):
+    metrics = getattr(context, "metrics", None)
+    if metrics:
+        metrics.start_trace()
     try:
         response = context.root.run(event)
     except Exception as e:
+        if metrics:
+            metrics.end_trace(event)
         if context.verbose:
             context.logger.error(traceback.format_exc())
         return context.Response(body=str(e), content_type="text/plain", status_code=400)
 
+    if metrics:
+        metrics.end_trace(event)
     body = response.body
     if isinstance(body, context.Response) or get_body:
         return body
 
     if body and not isinstance(body, (str, bytes)):
-        body = json.dumps(body)
+        body = codec.dumps(body)
         return context.Response(
             body=body, content_type="application/json", status_code=200
         )
@@ -200,7 +216,9 @@ def create_mock_server(
     if not graph:
         graph = ServingRouterState(class_name=router_class, class_args=router_args)
     namespace = namespace or get_caller_globals()
-    server = ModelServerHost(graph, parameters, load_mode, verbose=level == "debug")
+    server = ModelServerHost(
+        graph, parameters=parameters, load_mode=load_mode, verbose=level == "debug"
+    )
     server.init(context, namespace or {})
     return server
 
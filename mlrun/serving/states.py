@@ -11,13 +11,10 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
-import json
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
 
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
-import requests
-
+from .remote import RemoteHttpHandler
 from ..model import ModelObj, ObjectDict
 from ..utils import create_class
 
@@ -39,6 +36,19 @@ _task_state_fields = [
     "end",
 ]
 
+# step object methods which are timed when the serving metrics are enabled
+_instrumented_methods = [
+    "_resolve_route",
+    "preprocess",
+    "validate",
+    "predict",
+    "explain",
+    "postprocess",
+]
+
+# max number of routes (models) which are loaded in parallel
+default_load_workers = 8
+
 
 def new_model_endpoint(class_name, model_path, handler=None, **class_args):
     class_args = deepcopy(class_args)
@@ -82,7 +92,7 @@ class BaseState(ModelObj):
 
     @property
     def fullname(self):
-        name = self.name
+        name = self.name or self.kind
         if self._parent:
             name = ".".join([self._parent.fullname, name])
         return name
@@ -131,10 +141,21 @@ class ServingTaskState(BaseState):
                 class_args["context"] = self.context
             self._object = self._class_object(**class_args)
             self._handler = getattr(self._object, self.handler or "do_event", None)
+            metrics = getattr(self.context, "metrics", None)
+            if metrics and self._handler:
+                self._instrument(metrics)
 
         if mode != "skip":
             self._post_init(mode)
 
+    def _instrument(self, metrics):
+        fullname = self.fullname
+        self._handler = metrics.timed(fullname, "run", self._handler)
+        metrics.instrument(self._object, fullname, _instrumented_methods)
+        model_logger = getattr(self._object, "_model_logger", None)
+        if model_logger:
+            model_logger.push = metrics.timed(fullname, "monitoring", model_logger.push)
+
     @property
     def object(self):
         return self._object
@@ -189,10 +210,40 @@ class ServingRouterState(ServingTaskState):
 
         for route in self._routes.values():
             route.set_parent(self)
-            route.init_object(context, namespace, mode)
+            route.init_object(context, namespace, "skip")
 
+        if mode != "skip":
+            self._post_init_routes(mode)
         self._post_init(mode)
 
+    def _post_init_routes(self, mode="sync"):
+        """load the routes (models) in parallel, over a bounded thread pool
+
+        in sync mode we wait for all the routes to load (and raise the first error),
+        in async mode the routes are loaded in the background
+        """
+        routes = list(self._routes.values())
+        if not routes:
+            return
+        if mode == "sync" and len(routes) == 1:
+            routes[0]._post_init(mode)
+            return
+
+        workers = getattr(self.context, "load_workers", None) or default_load_workers
+        executor = ThreadPoolExecutor(
+            max_workers=min(len(routes), workers), thread_name_prefix="load-"
+        )
+        futures = [executor.submit(route._post_init, "sync") for route in routes]
+        if mode == "async":
+            self.context.logger.info(
+                f"started async loading for {[route.name for route in routes]}"
+            )
+            executor.shutdown(wait=False)
+            return
+        executor.shutdown(wait=True)
+        for future in futures:
+            future.result()
+
     def __getitem__(self, name):
         return self._routes[name]
 
@@ -292,46 +343,6 @@ class ServingRootFlowState(ServingFlowState):
     _dict_fields = ["states", "start_at"]
 
 
-http_adapter = HTTPAdapter(
-    max_retries=Retry(total=3, backoff_factor=1, status_forcelist=[500, 502, 503, 504])
-)
-
-
-class RemoteHttpHandler:
-    """class for calling remote endpoints"""
-
-    def __init__(self, url):
-        self.url = url
-        self.format = "json"
-        self._session = requests.Session()
-        self._session.mount("http://", http_adapter)
-        self._session.mount("https://", http_adapter)
-
-    def do_event(self, event):
-        kwargs = {}
-        kwargs["headers"] = event.headers or {}
-        method = event.method or "POST"
-        if method != "GET":
-            if isinstance(event.body, (str, bytes)):
-                kwargs["data"] = event.body
-            else:
-                kwargs["json"] = event.body
-
-        url = self.url.strip("/") + event.path
-        try:
-            resp = self._session.request(method, url, verify=False, **kwargs)
-        except OSError as err:
-            raise OSError(f"error: cannot run function at url {url}, {err}")
-        if not resp.ok:
-            raise RuntimeError(f"bad function response {resp.text}")
-
-        data = resp.content
-        if self.format == "json" or resp.headers["content-type"] == "application/json":
-            data = json.loads(data)
-        event.body = data
-        return event
-
-
 def get_class(class_name, namespace):
     """return class object from class name string"""
     if isinstance(class_name, type):
@@ -11,14 +11,22 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+import hashlib
+import json
 import threading
 import time
 import traceback
+from collections import OrderedDict
+from copy import deepcopy
 from typing import Dict
 from datetime import datetime
 
+import numpy as np
+
 import mlrun
 
+from . import binary
+
 
 class V2ModelServer:
     """base model serving class (v2), using similar API to KFServing v2 and Triton
@@ -35,6 +43,10 @@ class V2ModelServer:
     you can add custom api endpoint by adding method op_xx(event), will be invoked by
     calling the <model-url>/xx (operation = xx)
 
+    deterministic models can cache their responses, the cache is enabled by setting the
+    cache_size (max entries) parameter, and is controlled by the cache_ttl (seconds) and
+    cache_max_bytes parameters, the cache is cleared when the model is (re)loaded
+
     minimal serving function example:
 
         class MyClass(V2ModelServer):
@@ -65,13 +77,15 @@ class V2ModelServer:
         if ":" in name:
             self.name, self.version = name.split(":", 1)
         self.context = context
-        self.ready = False
+        self._load_done = threading.Event()
+        self._ready = False
         self.error = ""
         self.protocol = protocol or "v2"
         self.model_path = model_path
         self.model_spec: mlrun.artifacts.ModelArtifact = None
         self._params = context.merge_root_params(class_args)
         self._model_logger = _ModelLogPusher(self, context)
+        self._cache = _ResponseCache.from_params(self)
 
         self.metrics = {}
         self.labels = {}
@@ -79,12 +93,26 @@ class V2ModelServer:
             self.model = model
             self.ready = True
 
+    @property
+    def ready(self):
+        return self._ready
+
+    @ready.setter
+    def ready(self, ready):
+        self._ready = ready
+        if ready:
+            self._load_done.set()
+
     def _load_and_update_state(self):
+        if self._cache:
+            self._cache.clear()
         try:
             self.load()
         except Exception as e:
             self.error = e
             self.context.logger.error(traceback.format_exc())
+            # wake up the events waiting for the model, they will fail with the error
+            self._load_done.set()
             raise RuntimeError(f"failed to load model {self.name}, {e}")
         self.ready = True
         self.context.logger.info(f"model {self.name} was loaded")
@@ -144,11 +172,10 @@ class V2ModelServer:
         if not event.trigger or event.trigger == "http":
             raise RuntimeError(f"model {self.name} is not ready yet")
         self.context.logger.info(f"waiting for model {self.name} to load")
-        for i in range(50):  # wait up to 4.5 minutes
-            time.sleep(5)
-            if self.ready:
-                return
-        raise RuntimeError(f"model {self.name} is not ready {self.error}")
+        # wait up to 4 minutes, load() signals us as soon as it completes
+        self._load_done.wait(250)
+        if not self.ready:
+            raise RuntimeError(f"model {self.name} is not ready {self.error}")
 
     def _pre_event_processing_actions(self, event, op):
         self._check_readiness(event)
@@ -165,7 +192,11 @@ class V2ModelServer:
         if op == "predict" or op == "infer":
             # predict operation
             request = self._pre_event_processing_actions(event, op)
-            outputs = self.predict(request)
+            outputs = self._cached_predict(request) if self._cache else None
+            if outputs is None:
+                outputs = self.predict(request)
+                if self._cache:
+                    self._cache.put(request, outputs)
             response = {
                 "id": request["id"],
                 "model_name": self.name,
@@ -223,16 +254,29 @@ class V2ModelServer:
         response = self.postprocess(response)
         if self._model_logger:
             self._model_logger.push(start, request, response)
+        if binary.binary_output_requested(request):
+            body, header_length = binary.encode_response(response)
+            response = self.context.Response(
+                body=body,
+                content_type=binary.binary_content_type,
+                headers={"Inference-Header-Content-Length": str(header_length)},
+            )
         event.body = response
         return event
 
+    def _cached_predict(self, request):
+        outputs = self._cache.get(request)
+        self.set_metric("cache_hits", self._cache.hits)
+        self.set_metric("cache_misses", self._cache.misses)
+        return outputs
+
     def validate(self, request, operation):
         """validate the event body (after preprocess)"""
         if self.protocol == "v2":
             if "inputs" not in request:
                 raise Exception('Expected key "inputs" in request body')
 
-            if not isinstance(request["inputs"], list):
+            if not isinstance(request["inputs"], (list, np.ndarray)):
                 raise Exception('Expected "inputs" to be a list')
 
         return request
@@ -307,3 +351,93 @@ class _ModelLogPusher:
                 if getattr(self.model, "metrics", None):
                     data["metrics"] = self.model.metrics
                 self.output_stream.push([data])
+
+
+class _ResponseCache:
+    """LRU cache of model outputs, keyed by the request inputs and model version"""
+
+    def __init__(self, model, size, ttl=None, max_bytes=None):
+        self.model = model
+        self.size = size
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._bytes = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_params(cls, model):
+        size = model.get_param("cache_size")
+        if not size:
+            return None
+        ttl = model.get_param("cache_ttl")
+        max_bytes = model.get_param("cache_max_bytes")
+        return cls(
+            model,
+            int(size),
+            float(ttl) if ttl else None,
+            int(max_bytes) if max_bytes else None,
+        )
+
+    def _key(self, request):
+        data = json.dumps(
+            [self.model.version, request.get("inputs")],
+            sort_keys=True,
+            default=_hashable,
+        )
+        return hashlib.sha1(data.encode()).hexdigest()
+
+    def get(self, request):
+        key = self._key(request)
+        with self._lock:
+            item = self._items.get(key)
+            if item is not None and self.ttl and time.monotonic() > item[1]:
+                self._remove(key)
+                item = None
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+        return deepcopy(item[0])
+
+    def put(self, request, outputs):
+        if isinstance(outputs, np.ndarray):
+            size = outputs.nbytes
+        else:
+            try:
+                size = len(json.dumps(outputs, default=str))
+            except (TypeError, ValueError):
+                return
+        if self.max_bytes and size > self.max_bytes:
+            return
+        key = self._key(request)
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            if key in self._items:
+                self._remove(key)
+            self._items[key] = (deepcopy(outputs), expires, size)
+            self._bytes += size
+            while len(self._items) > self.size or (
+                self.max_bytes and self._bytes > self.max_bytes
+            ):
+                self._remove(next(iter(self._items)))
+
+    def _remove(self, key):
+        item = self._items.pop(key)
+        self._bytes -= item[2]
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+
+def _hashable(value):
+    if isinstance(value, np.ndarray):
+        # str() of large arrays is truncated, hash the array data
+        digest = hashlib.sha1(np.ascontiguousarray(value).data).hexdigest()
+        return [str(value.dtype), list(value.shape), digest]
+    return str(value)
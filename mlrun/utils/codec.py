@@ -0,0 +1,83 @@
+# Copyright 2018 Iguazio
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""pluggable json codec, used on the serving (and model monitoring) hot path
+
+the default codec uses orjson when available (with native numpy serialization),
+and falls back to the standard json module, a custom codec can be set using set_codec()
+"""
+import json
+
+from .helpers import MyEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class JsonCodec:
+    """standard library json codec (with numpy support)"""
+
+    name = "json"
+
+    def loads(self, data):
+        return json.loads(data)
+
+    def dumps(self, obj):
+        """serialize to json (str or bytes)"""
+        return json.dumps(obj, cls=MyEncoder)
+
+
+class OrjsonCodec(JsonCodec):
+    """orjson codec, serialize numpy arrays and scalars natively"""
+
+    name = "orjson"
+
+    def __init__(self):
+        self._options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+    def dumps(self, obj):
+        return orjson.dumps(obj, default=_default, option=self._options)
+
+
+def _default(obj):
+    # non contiguous arrays and other numpy types which orjson dont handle natively
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    return str(obj)
+
+
+_codec = OrjsonCodec() if orjson else JsonCodec()
+
+
+def get_codec():
+    """return the current json codec"""
+    return _codec
+
+
+def set_codec(codec):
+    """set the json codec (object with loads(data) and dumps(obj) methods)"""
+    global _codec
+    _codec = codec
+
+
+def loads(data):
+    return _codec.loads(data)
+
+
+def dumps(obj):
+    return _codec.dumps(obj)
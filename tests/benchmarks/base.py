@@ -0,0 +1,22 @@
+import os
+import time
+
+import pytest
+
+from mlrun.utils import create_logger
+
+logger = create_logger(level="info", name="benchmark")
+
+# benchmarks are slow, they only run when MLRUN_BENCHMARKS is set (e.g. make benchmark)
+benchmark = pytest.mark.skipif(
+    not os.environ.get("MLRUN_BENCHMARKS"),
+    reason="This is a benchmark, set MLRUN_BENCHMARKS=1 to run it",
+)
+
+
+def measure(func, count, *args, **kwargs):
+    """call func count times, return the rate (calls per second)"""
+    start = time.perf_counter()
+    for _ in range(count):
+        func(*args, **kwargs)
+    return count / (time.perf_counter() - start)
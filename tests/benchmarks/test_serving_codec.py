@@ -0,0 +1,44 @@
+import json
+
+import numpy as np
+
+from mlrun.serving import V2ModelServer
+from mlrun.serving.server import MockEvent, create_mock_server, v2_serving_handler
+from mlrun.utils import codec
+from tests.benchmarks.base import benchmark, logger, measure
+
+
+class EchoModel(V2ModelServer):
+    def load(self):
+        pass
+
+    def predict(self, request):
+        return np.asarray(request["inputs"]).sum(axis=1)
+
+
+@benchmark
+def test_serving_events_per_sec():
+    host = create_mock_server(level="error")
+    host.add_model("echo", class_name=EchoModel, model_path="")
+    body = json.dumps({"inputs": np.random.rand(100, 20).tolist()})
+
+    def send():
+        event = MockEvent(body, path="/v2/models/echo/infer")
+        resp = v2_serving_handler(host.context, event)
+        assert resp.status_code == 200
+
+    current = codec.get_codec()
+    results = {}
+    try:
+        for name, json_codec in [
+            ("json", codec.JsonCodec()),
+            ("orjson", codec.OrjsonCodec()),
+        ]:
+            codec.set_codec(json_codec)
+            measure(send, 100)
+            results[name] = measure(send, 2000)
+    finally:
+        codec.set_codec(current)
+
+    logger.info("serving events/sec (100x20 inputs)", **results)
+    assert results["orjson"] > results["json"], "orjson codec should be faster"
@@ -2,11 +2,26 @@ import json
 import os
 import time
 
+import numpy as np
+import requests
+
 from mlrun.runtimes import nuclio_init_hook
-from mlrun.runtimes.serving import serving_subkind
+from mlrun.runtimes.serving import ServingRuntime, serving_subkind
 from mlrun.serving import V2ModelServer
-from mlrun.serving.server import MockEvent, MockContext, create_mock_server
-from mlrun.serving.states import ServingRouterState, ServingTaskState
+from mlrun.serving.benchmark import benchmark_server
+from mlrun.serving import binary
+from mlrun.serving.server import (
+    MockEvent,
+    MockContext,
+    create_mock_server,
+    v2_serving_handler,
+)
+from mlrun.serving.states import (
+    ServingRouterState,
+    ServingTaskState,
+    new_remote_endpoint,
+)
+from tests.serving.remote_stub import StubServer
 
 router_object = ServingRouterState()
 router_object.routes = {
@@ -235,3 +250,214 @@ def test_v2_mock():
     host.add_model("my", class_name=ModelTestingClass, model_path="", z=100)
     print(host.test("my/infer", testdata))
     print(host.to_yaml())
+
+
+class SlowModelTestingClass(V2ModelServer):
+    def load(self):
+        time.sleep(1)
+
+    def predict(self, request):
+        return request["inputs"][0]
+
+
+def test_v2_parallel_load():
+    routes = {
+        f"m{i}": {
+            "class_name": "SlowModelTestingClass",
+            "class_args": {"model_path": ""},
+        }
+        for i in range(4)
+    }
+    os.environ["SERVING_SPEC_ENV"] = json.dumps(
+        generate_spec({"kind": "router", "routes": routes})
+    )
+    context = MockContext()
+    start = time.monotonic()
+    nuclio_init_hook(context, globals(), serving_subkind)
+    # models are loaded in parallel, total time should be close to a single load
+    assert time.monotonic() - start < 3, "models were not loaded in parallel"
+
+    event = MockEvent('{"model": "m3", "inputs": [5]}')
+    resp = context.mlrun_handler(context, event)
+    data = json.loads(resp.body)
+    assert data["outputs"] == 5, f"wrong model response {data}"
+
+
+def test_v2_async_ready_event():
+    # stream events should be processed as soon as the model is loaded
+    os.environ["SERVING_SPEC_ENV"] = json.dumps(asyncspec)
+    context = MockContext()
+    start = time.monotonic()
+    nuclio_init_hook(context, globals(), serving_subkind)
+
+    event = MockEvent('{"model": "m5", "inputs": [5]}')
+    event.trigger = "stream"
+    resp = context.mlrun_handler(context, event)
+    data = json.loads(resp.body)
+    assert data["outputs"] == 5, f"wrong model response {data}"
+    assert time.monotonic() - start < 5.5, "event waited after the model was ready"
+
+
+class CountingModelTestingClass(V2ModelServer):
+    def load(self):
+        self.count = 0
+
+    def predict(self, request):
+        self.count += 1
+        return request["inputs"][0] * 2
+
+
+def test_v2_response_cache():
+    host = create_mock_server()
+    host.add_model(
+        "my", class_name=CountingModelTestingClass, model_path="", cache_size=2
+    )
+    model = host.graph["my"].object
+    for inputs in [5, 5, 6, 5, 7, 6]:
+        resp = host.test("my/infer", {"inputs": [inputs]})
+        assert resp["outputs"] == inputs * 2, f"wrong model response {resp}"
+
+    # 5 (miss), 5 (hit), 6 (miss), 5 (hit), 7 (miss, evict 6), 6 (miss)
+    assert model.count == 4, "cache was not used"
+    assert model.metrics["cache_hits"] == 2
+    assert model.metrics["cache_misses"] == 4
+
+    # cache is invalidated on model reload
+    model._load_and_update_state()
+    host.test("my/infer", {"inputs": [6]})
+    assert model.count == 1, "cache was not invalidated"
+
+
+def test_v2_remote():
+    server = StubServer().start()
+    try:
+        host = create_mock_server()
+        host.graph.add_route(
+            "remote", new_remote_endpoint(server.url, breaker_failures=2, retries=0)
+        ).init_object(host.context, {})
+        resp = host.test("remote/infer", {"inputs": [5]})
+        assert resp == {
+            "path": "/infer",
+            "body": {"inputs": [5]},
+        }, f"wrong remote response {resp}"
+
+        # after 2 failures the circuit opens and calls fail without reaching the remote
+        for i in range(2):
+            resp = host.test("remote/fail", {"inputs": [5]}, silent=True)
+            assert resp.status_code == 400
+        requests = server.requests
+        resp = host.test("remote/infer", {"inputs": [5]}, silent=True)
+        assert resp.status_code == 400 and "circuit is open" in resp.body
+        assert server.requests == requests, "open circuit did not fail fast"
+    finally:
+        server.stop()
+
+
+def test_v2_benchmark():
+    requests = [("m1/infer", {"inputs": [5]}), ("m2/infer", {"inputs": [5]})]
+    graph = generate_spec(router_object.to_dict())["graph"]
+    df = benchmark_server(graph, requests, concurrency=2, count=20, namespace=globals())
+    routes = df[df["kind"] == "route"].set_index("name")
+    assert routes.loc["m1/infer", "requests"] == 10
+    assert routes["errors"].sum() == 0
+    steps = df[df["kind"] == "step"]["name"].tolist()
+    assert (
+        "router.m1" in steps and "router.m2" in steps
+    ), f"missing step results {steps}"
+
+    df = benchmark_server(
+        graph, requests, mode="open", rate=200, count=20, namespace=globals()
+    )
+    assert df[df["kind"] == "route"]["requests"].sum() == 20
+
+
+def test_v2_metrics():
+    os.environ["SERVING_SPEC_ENV"] = json.dumps(
+        generate_spec(router_object.to_dict(), params={"metrics": True})
+    )
+    context = MockContext()
+    nuclio_init_hook(context, globals(), serving_subkind)
+    for i in range(3):
+        event = MockEvent(testdata, path="/v2/models/m1/infer")
+        context.mlrun_handler(context, event)
+
+    histograms = context.metrics.to_dict()
+    assert histograms["router.run"]["count"] == 3
+    assert histograms["router.resolve_route"]["count"] == 3
+    assert histograms["router.m1.predict"]["count"] == 3
+    assert "router.m2.predict" not in histograms
+
+    event = MockEvent("", path="/metrics", method="GET")
+    resp = context.mlrun_handler(context, event)
+    assert resp.status_code == 200
+    assert (
+        'mlrun_serving_step_latency_seconds_count{step="router.m1",op="predict"} 3'
+        in resp.body
+    ), f"wrong metrics response {resp.body}"
+
+
+def test_v2_metrics_disabled():
+    context = init_ctx()
+    assert context.metrics is None
+    assert context.root._handler == context.root.object.do_event
+    event = MockEvent("", path="/metrics", method="GET")
+    resp = context.mlrun_handler(context, event)
+    assert resp.status_code == 400, "metrics should not be served when disabled"
+
+
+class TensorModelTestingClass(V2ModelServer):
+    def load(self):
+        pass
+
+    def predict(self, request):
+        inputs = request["inputs"]
+        assert isinstance(inputs, np.ndarray), "inputs should be a numpy array"
+        return inputs.sum(axis=1)
+
+
+def test_v2_binary_tensors():
+    host = create_mock_server()
+    host.add_model("my", class_name=TensorModelTestingClass, model_path="")
+    data = np.arange(12, dtype=np.float32).reshape(4, 3)
+
+    body, headers = binary.encode_request(data)
+    event = MockEvent(body, path="/v2/models/my/infer", headers=headers)
+    resp = v2_serving_handler(host.context, event)
+    assert resp.status_code == 200, f"binary request failed {resp.body}"
+    header_length = int(resp.headers["Inference-Header-Content-Length"])
+    result = binary.decode_response(resp.body, header_length)
+    assert result["model_name"] == "my"
+    np.testing.assert_array_equal(result["outputs"], data.sum(axis=1))
+
+    # the inputs point to the request body
+    request = binary.decode_request(
+        body, int(headers["Inference-Header-Content-Length"])
+    )
+    assert not request["inputs"].flags.owndata, "inputs should not be copied"
+
+    # binary request with a json response
+    body, headers = binary.encode_request(data, binary_output=False)
+    event = MockEvent(body, path="/v2/models/my/infer", headers=headers)
+    resp = v2_serving_handler(host.context, event)
+    assert json.loads(resp.body)["outputs"] == [3, 12, 21, 30]
+
+
+def test_v2_local_server():
+    fn = ServingRuntime()
+    fn.add_model("m1", model_path="-", class_name="ModelTestingClass", z=100)
+    server = fn.to_local_server(port=0, workers=2, namespace=globals()).start()
+    url = f"http://127.0.0.1:{server.port}/v2/models/m1/infer"
+    try:
+        for i in range(4):
+            resp = requests.post(url, data=testdata)
+            assert resp.status_code == 200, f"bad response {resp.text}"
+            assert resp.json()["outputs"] == 500
+
+        server.reload()
+        resp = requests.post(url, data=testdata)
+        assert resp.json()["outputs"] == 500
+
+        resp = requests.post(f"http://127.0.0.1:{server.port}/v2/models/xx/infer")
+        assert resp.status_code == 400
+    finally:
+        server.stop()